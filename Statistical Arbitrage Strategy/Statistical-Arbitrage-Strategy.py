@@ -1,15 +1,20 @@
 # %%
 # Statistical Arbitrage Strategy for Binance Futures Library
 import ccxt.async_support as ccxt
+import aiohttp
 import pandas as pd
 import numpy as np
 import asyncio
 import logging
-import json
+import orjson
 import websockets
 import os
 import time
+import math
+from collections import deque
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
+from numba import njit, float64
 
 # %%
 # Load environment variables
@@ -27,11 +32,13 @@ api_secret = os.getenv("BINANCE_API_SECRET")
 # %%
 # Trading pair symbols (format: BASE/QUOTE)
 SYMBOL1 = 'ALCH/USDT:USDT'  # First trading pair (Alchemy token vs USDT)
-SYMBOL2 = 'BTC/USDT'   # Second trading pair (Bitcoin vs USDT)
+SYMBOL2 = 'BTC/USDT:USDT'  # Second trading pair (Bitcoin USDⓈ-M perpetual, same venue as the fstream feeds)
 
 # WebSocket endpoints for real-time order book data (Binance Futures)
 WS_URL1 = 'wss://fstream.binance.com/ws/alchusdt@depth10@100ms'  # ALCH/USDT order book (top 10 levels, 100ms updates)
 WS_URL2 = 'wss://fstream.binance.com/ws/btcusdt@depth10@100ms'   # BTC/USDT order book (top 10 levels, 100ms updates)
+WS_KLINE_URL1 = 'wss://fstream.binance.com/ws/alchusdt@kline_1m'  # ALCH/USDT 1m candles
+WS_KLINE_URL2 = 'wss://fstream.binance.com/ws/btcusdt@kline_1m'   # BTC/USDT 1m candles
 
 # Risk management parameters
 RISK_AMOUNT = 10.0     # Maximum capital to risk per trade (in USDT)
@@ -40,6 +47,8 @@ FEE_RATE = 0.002       # Taker fee rate (0.2% per trade)
 
 # Strategy configuration
 LOOKBACK = 500         # Historical data window size for calculations
+BAR_MS = 60_000        # Length of a 1m bar in milliseconds
+BACKFILL_LIMIT = 1000  # Max bars fetched to fill a stream gap
 SIGMA_THRESHOLD = 1.0  # Standard deviation threshold for trade signals
 ATR_PERIOD = 14        # Period for Average True Range indicator
 TP_MULTIPLIER = 2.0    # Take-profit multiplier (relative to ATR)
@@ -47,10 +56,69 @@ SL_MULTIPLIER = 1.0    # Stop-loss multiplier (relative to ATR)
 
 # Position management
 MAX_POSITION = 2       # Maximum concurrent open positions allowed
-CHECK_INTERVAL = 0.1   # Seconds between strategy condition checks
+BATCH_ORDER_LIMIT = 5  # Max orders per Binance Futures batchOrders request
+STATUS_LOG_EVERY = 100 # Strategy ticks between status log lines
+STREAM_RETRY_DELAY = 5 # Seconds before restarting a failed market data stream
 
-# Tracking open positions (list of active trades)
-OPEN_POSITIONS = []    # Stores currently active positions
+# %%
+class Positions:
+    """
+    📋 Open positions stored as parallel NumPy arrays (structure of arrays)
+    Lets TP/SL checks run as one vectorized comparison across all positions.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.n = 0                                          # Number of live positions
+        self.entry = np.empty(capacity)                     # Entry prices
+        self.qty = np.empty(capacity)                       # Quantities
+        self.tp = np.empty(capacity)                        # Take-profit prices
+        self.sl = np.empty(capacity)                        # Stop-loss prices
+        self.side = np.empty(capacity, dtype=np.int8)       # +1 long, -1 short
+        self.symbol = np.empty(capacity, dtype=object)      # Trading pair symbols
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _arrays(self) -> tuple:
+        return self.entry, self.qty, self.tp, self.sl, self.side, self.symbol
+
+    def add(self, symbol: str, side: int, entry_price: float, quantity: float,
+            tp_price: float, sl_price: float):
+        """➕ Append a position, doubling capacity when full"""
+        if self.n == len(self.entry):
+            self.entry, self.qty, self.tp, self.sl, self.side, self.symbol = (
+                np.concatenate([arr, np.empty_like(arr)]) for arr in self._arrays())
+        i = self.n
+        self.entry[i] = entry_price
+        self.qty[i] = quantity
+        self.tp[i] = tp_price
+        self.sl[i] = sl_price
+        self.side[i] = side
+        self.symbol[i] = symbol
+        self.n += 1
+
+    def remove(self, indices):
+        """🗑️ Drop positions by index, compacting the live rows in place"""
+        if len(indices) == 0:
+            return
+        # Rows before the first removed index are already in place
+        first = int(np.min(indices))
+        keep = np.ones(self.n - first, dtype=bool)
+        keep[np.asarray(indices) - first] = False
+        k = first + int(keep.sum())
+        for arr in self._arrays():
+            arr[first:k] = arr[first:self.n][keep]
+        self.symbol[k:self.n] = None
+        self.n = k
+
+
+# Tracking open positions (active trades)
+OPEN_POSITIONS = Positions()    # Stores currently active positions
+
+# Streamed market data
+QUOTES = {}                                # Latest (bid, ask) per symbol in integer price ticks
+TICK_SIZES = {}                            # Price tick per symbol, from market precision
+PENDING_BARS = {SYMBOL1: {}, SYMBOL2: {}}  # Closed klines waiting for the other symbol, keyed by open time
 
 # %% [markdown]
 # Fetch Data
@@ -88,120 +156,497 @@ async def fetch_data(exchange, symbol: str, timeframe: str, limit: int = 100) ->
         return pd.DataFrame()
 
 # %% [markdown]
-# Fetch Quotes
+# Calculate Indicator
 
 # %%
-async def fetch_quotes(exchange, symbol: str) -> tuple:
+@dataclass
+class IndicatorState:
+    """
+    🧠 Rolling state for the streaming ALCH/BTC indicator estimator
+    Each closed bar is folded in with O(1) add-new/drop-old updates instead of
+    recomputing logs, covariance and rolling windows over the whole history.
     """
-    Fetches real-time bid/ask prices from exchange order book
-    Returns (bid, ask) tuple with validation checks
+    last_ts: int = None                   # Open time (ms) of the last ingested bar
+    prev_log_alch: float = np.nan         # log(ALCH close) of the last ingested bar, reused for the next return
+    prev_log_btc: float = np.nan          # log(BTC close) of the last ingested bar, reused for the next return
+    prev_close_alch: float = np.nan       # ALCH close of the last ingested bar (for TR)
+
+    # 📐 Beta: running sums over the last LOOKBACK log-return pairs
+    returns: deque = field(default_factory=lambda: deque(maxlen=LOOKBACK))
+    sum_r_alch: float = 0.0
+    sum_r_btc: float = 0.0
+    sum_r_alch_btc: float = 0.0
+    sum_r_btc_sq: float = 0.0
+    beta: float = np.nan
+
+    # 📊 Spread: running sums over the last LOOKBACK log prices, taken relative to the
+    # first ingested log price (x = log ALCH - ref, y = log BTC - ref) to keep the
+    # squares small. μ/σ are derived from them with the current β, so every bar in
+    # the window is priced with the same hedge ratio as the live spread
+    logs: deque = field(default_factory=lambda: deque(maxlen=LOOKBACK))
+    log_ref_alch: float = np.nan
+    log_ref_btc: float = np.nan
+    sum_x: float = 0.0
+    sum_y: float = 0.0
+    sum_xx: float = 0.0
+    sum_yy: float = 0.0
+    sum_xy: float = 0.0
+
+    # 🌡️ ATR: running sum over the last ATR_PERIOD true ranges
+    trs: deque = field(default_factory=lambda: deque(maxlen=ATR_PERIOD))
+    atr_sum: float = 0.0
+
+
+# Shared estimator state, fed by every call to calculate_indicator
+INDICATOR_STATE = IndicatorState()
+
+
+def _ingest_bar(state: IndicatorState, ts, close_alch: float, close_btc: float, tr: float):
+    """
+    ➕ Fold a single closed bar into the rolling indicator state
 
     Args:
-        exchange: Connected exchange instance
-        symbol: Trading pair (e.g., 'BTC/USDT')
+        state: Estimator state to update in place
+        ts: Bar open time in ms
+        close_alch: ALCH/USDT close
+        close_btc: BTC/USDT close
+        tr: ALCH/USDT true range of the bar
+    """
+    log_alch = math.log(close_alch)
+    log_btc = math.log(close_btc)
+
+    # 🔄 Newest log-return pair, dropping the oldest one once the window is full
+    if not math.isnan(state.prev_log_alch):
+        r_alch = log_alch - state.prev_log_alch
+        r_btc = log_btc - state.prev_log_btc
+        if len(state.returns) == state.returns.maxlen:
+            old_alch, old_btc = state.returns[0]
+            state.sum_r_alch -= old_alch
+            state.sum_r_btc -= old_btc
+            state.sum_r_alch_btc -= old_alch * old_btc
+            state.sum_r_btc_sq -= old_btc * old_btc
+        state.returns.append((r_alch, r_btc))
+        state.sum_r_alch += r_alch
+        state.sum_r_btc += r_btc
+        state.sum_r_alch_btc += r_alch * r_btc
+        state.sum_r_btc_sq += r_btc * r_btc
+
+        # 📐 β = Cov(Alch,Btc) / Var(Btc) from the running sums
+        n = len(state.returns)
+        denom = n * state.sum_r_btc_sq - state.sum_r_btc * state.sum_r_btc
+        if n >= 2 and denom > 0:
+            state.beta = (n * state.sum_r_alch_btc - state.sum_r_alch * state.sum_r_btc) / denom
+
+    # ⚖️ Log-price window sums, dropping the oldest bar once the window is full
+    if math.isnan(state.log_ref_alch):
+        state.log_ref_alch = log_alch
+        state.log_ref_btc = log_btc
+    x = log_alch - state.log_ref_alch
+    y = log_btc - state.log_ref_btc
+    if len(state.logs) == state.logs.maxlen:
+        old_x, old_y = state.logs[0]
+        state.sum_x -= old_x
+        state.sum_y -= old_y
+        state.sum_xx -= old_x * old_x
+        state.sum_yy -= old_y * old_y
+        state.sum_xy -= old_x * old_y
+    state.logs.append((x, y))
+    state.sum_x += x
+    state.sum_y += y
+    state.sum_xx += x * x
+    state.sum_yy += y * y
+    state.sum_xy += x * y
+
+    # 🌡️ Rolling ATR sum
+    if len(state.trs) == state.trs.maxlen:
+        state.atr_sum -= state.trs[0]
+    state.trs.append(tr)
+    state.atr_sum += tr
+
+    state.last_ts = ts
+    state.prev_log_alch = log_alch
+    state.prev_log_btc = log_btc
+    state.prev_close_alch = close_alch
+
+
+def make_indicator_kernel(lookback: int, atr_period: int):
+    """
+    🏭 Build the compiled history kernel specialized for fixed window sizes
+    lookback and atr_period are closure constants that numba freezes at
+    compile time, so window bounds fold into the generated code. The kernel
+    is compiled eagerly for float64 arrays when the module loads.
+
+    Args:
+        lookback: Window for beta returns and spread statistics
+        atr_period: Window for ATR
 
     Returns:
-        tuple: (bid_price, ask_price) or (0.0, inf) on error
+        Compiled kernel(close1, close2, tr)
     """
-    try:
-        # 📊 Fetch full order book data
-        order_book = await exchange.fetch_order_book(symbol)
+    @njit((float64[:], float64[:], float64[:]), cache=True, fastmath=True, boundscheck=False)
+    def kernel(close1, close2, tr):
+        """
+        🚀 Compiled bulk version of _ingest_bar over a full history of closed bars
+        Used to seed the rolling state on cold start in one native pass.
+
+        Args:
+            close1: ALCH/USDT closes (float64)
+            close2: BTC/USDT closes (float64)
+            tr: ALCH/USDT true ranges (float64)
+
+        Returns:
+            tuple: (r_alch, r_btc, sums[4], beta, has_beta, log_alch, log_btc,
+                    log_sums[5], atr_sum)
+                    - arrays hold the full series, callers keep only the window tails
+                    - log_sums are Σx, Σy, Σx², Σy², Σxy over the last `lookback`
+                      log prices relative to the first bar's
+        """
+        n_bars = close1.shape[0]
+
+        # 📈 First pass: log prices and log-returns
+        log_alch = np.empty(n_bars)
+        log_btc = np.empty(n_bars)
+        for i in range(n_bars):
+            log_alch[i] = np.log(close1[i])
+            log_btc[i] = np.log(close2[i])
+        n_ret = max(n_bars - 1, 0)
+        r_alch = np.empty(n_ret)
+        r_btc = np.empty(n_ret)
+        for i in range(n_ret):
+            r_alch[i] = log_alch[i + 1] - log_alch[i]
+            r_btc[i] = log_btc[i + 1] - log_btc[i]
+
+        # 🔄 Second pass: rolling beta and rolling ATR sum
+        sums = np.zeros(4)  # Σr_alch, Σr_btc, Σr_alch·r_btc, Σr_btc²
+        beta = 0.0
+        has_beta = False
+        atr_sum = 0.0
+        for i in range(n_bars):
+            if i > 0:
+                j = i - 1
+                if j >= lookback:
+                    old_a = r_alch[j - lookback]
+                    old_b = r_btc[j - lookback]
+                    sums[0] -= old_a
+                    sums[1] -= old_b
+                    sums[2] -= old_a * old_b
+                    sums[3] -= old_b * old_b
+                sums[0] += r_alch[j]
+                sums[1] += r_btc[j]
+                sums[2] += r_alch[j] * r_btc[j]
+                sums[3] += r_btc[j] * r_btc[j]
+                k = min(j + 1, lookback)
+                denom = k * sums[3] - sums[1] * sums[1]
+                if k >= 2 and denom > 0:
+                    beta = (k * sums[2] - sums[0] * sums[1]) / denom
+                    has_beta = True
+
+            if i >= atr_period:
+                atr_sum -= tr[i - atr_period]
+            atr_sum += tr[i]
+
+        # ⚖️ Log-price sums over the last `lookback` bars, relative to the first bar
+        log_sums = np.zeros(5)  # Σx, Σy, Σx², Σy², Σxy
+        for i in range(max(n_bars - lookback, 0), n_bars):
+            x = log_alch[i] - log_alch[0]
+            y = log_btc[i] - log_btc[0]
+            log_sums[0] += x
+            log_sums[1] += y
+            log_sums[2] += x * x
+            log_sums[3] += y * y
+            log_sums[4] += x * y
+
+        return r_alch, r_btc, sums, beta, has_beta, log_alch, log_btc, log_sums, atr_sum
+
+    return kernel
+
+
+# Kernel specialized for the configured windows
+_calc_indicator_kernel = make_indicator_kernel(LOOKBACK, ATR_PERIOD)
+
+
+def _seed_state(state: IndicatorState, ts, close1: np.ndarray, close2: np.ndarray, tr: np.ndarray):
+    """
+    🌱 Load a full history of closed bars into an empty indicator state
 
-        # 🎯 Extract best bid (highest buy price)
-        bid = order_book['bids'][0][0] if order_book['bids'] else 0.0
+    Args:
+        state: Fresh estimator state to fill in place
+        ts: Open time (ms) of the last bar in the history
+        close1, close2, tr: float64 arrays of the closed bars
+    """
+    (r_alch, r_btc, sums, beta, has_beta,
+     log_alch, log_btc, log_sums, atr_sum) = _calc_indicator_kernel(close1, close2, tr)
 
-        # 🎯 Extract best ask (lowest sell price)
-        ask = order_book['asks'][0][0] if order_book['asks'] else float('inf')
+    state.returns = deque(zip(r_alch[-LOOKBACK:].tolist(), r_btc[-LOOKBACK:].tolist()), maxlen=LOOKBACK)
+    state.sum_r_alch, state.sum_r_btc, state.sum_r_alch_btc, state.sum_r_btc_sq = sums.tolist()
+    state.beta = beta if has_beta else np.nan
 
-        # ⚠️ Validate quotes
-        if bid <= 0 or ask <= 0 or bid > ask:
-            logger.warning(f"🚨 Invalid quotes for {symbol}: bid={bid}, ask={ask}")
-            return 0.0, float('inf')
+    state.log_ref_alch = float(log_alch[0])
+    state.log_ref_btc = float(log_btc[0])
+    state.logs = deque(zip((log_alch[-LOOKBACK:] - log_alch[0]).tolist(),
+                           (log_btc[-LOOKBACK:] - log_btc[0]).tolist()), maxlen=LOOKBACK)
+    state.sum_x, state.sum_y, state.sum_xx, state.sum_yy, state.sum_xy = log_sums.tolist()
 
-        # 💹 Log market data with spread calculation
-        spread = ask - bid
-        logger.info(f"📈 {symbol} | Bid: {bid:.8f} | Ask: {ask:.8f} | Spread: {spread:.8f}")
+    state.trs = deque(tr[-ATR_PERIOD:].tolist(), maxlen=ATR_PERIOD)
+    state.atr_sum = atr_sum
 
-        return bid, ask
+    state.last_ts = ts
+    state.prev_log_alch = float(log_alch[-1])
+    state.prev_log_btc = float(log_btc[-1])
+    state.prev_close_alch = float(close1[-1])
 
-    except ccxt.BaseError as e:
-        logger.error(f"🔌 Exchange error fetching {symbol}: {str(e)}")
-        return 0.0, float('inf')
-    except Exception as e:
-        logger.error(f"⚠️ General error fetching {symbol}: {str(e)}")
-        return 0.0, float('inf')
 
-# %% [markdown]
-# Calculate Indicator
+def ingest_bars(ts: np.ndarray, close1: np.ndarray, close2: np.ndarray,
+                high1: np.ndarray, low1: np.ndarray):
+    """
+    ➕ Fold closed ALCH/BTC bars into INDICATOR_STATE
+    Bars at or before the last ingested open time are skipped, so overlapping
+    history and stream updates can be fed in safely.
 
-# %%
-def calculate_indicator(df1: pd.DataFrame,df2: pd.DataFrame,alch_price: float,btc_price: float) -> tuple:
+    Args:
+        ts: Bar open times in ms (int64, ascending)
+        close1: ALCH/USDT closes (float64)
+        close2: BTC/USDT closes (float64)
+        high1: ALCH/USDT highs (float64)
+        low1: ALCH/USDT lows (float64)
     """
-    📊 Calculate statistical arbitrage indicators for ALCH/BTC pair
+    state = INDICATOR_STATE
+    if state.last_ts is not None:
+        new = ts > state.last_ts
+        ts, close1, close2, high1, low1 = ts[new], close1[new], close2[new], high1[new], low1[new]
+    if len(ts) == 0:
+        return
+
+    # 🌡️ True Range: max(H-L, |H-prevC|, |L-prevC|) in one fused pass
+    # (fmax skips the NaN previous close on the very first bar)
+    prev_c = np.empty_like(close1)
+    prev_c[0] = state.prev_close_alch
+    prev_c[1:] = close1[:-1]
+    tr = np.fmax(np.fmax(high1 - low1, np.abs(high1 - prev_c)), np.abs(low1 - prev_c))
+
+    if state.last_ts is None:
+        # 🚀 Cold start: fold the whole history in one compiled pass
+        _seed_state(state, int(ts[-1]), close1, close2, tr)
+    else:
+        # ➕ Ingest only the new bars
+        for t, close_alch, close_btc, tr_alch in zip(
+                ts.tolist(), close1.tolist(), close2.tolist(), tr.tolist()):
+            _ingest_bar(state, t, close_alch, close_btc, tr_alch)
+
+
+def history_bars(df1: pd.DataFrame, df2: pd.DataFrame) -> tuple:
+    """
+    🧩 Pair up closed REST bars of both symbols by open time
+    The last row of each frame is the still-forming candle and is dropped.
 
     Args:
         df1: ALCH/USDT OHLCV DataFrame
         df2: BTC/USDT OHLCV DataFrame
+
+    Returns:
+        tuple: (ts, close1, close2, high1, low1) arrays ready for ingest_bars
+    """
+    t1 = df1['timestamp'].to_numpy()[:-1].astype('datetime64[ms]').astype(np.int64)
+    t2 = df2['timestamp'].to_numpy()[:-1].astype('datetime64[ms]').astype(np.int64)
+    ts, i1, i2 = np.intersect1d(t1, t2, assume_unique=True, return_indices=True)
+    return (ts,
+            df1['close'].to_numpy(dtype=np.float64)[i1],
+            df2['close'].to_numpy(dtype=np.float64)[i2],
+            df1['high'].to_numpy(dtype=np.float64)[i1],
+            df1['low'].to_numpy(dtype=np.float64)[i1])
+
+
+def calculate_indicator(alch_price: float, btc_price: float) -> tuple:
+    """
+    📊 Calculate statistical arbitrage indicators for ALCH/BTC pair
+    Reads the rolling INDICATOR_STATE kept up to date by ingest_bars
+
+    Args:
         alch_price: Current ALCH price
         btc_price: Current BTC price
 
     Returns:
-        tuple: (DataFrame with indicators, current spread value)
+        tuple: (mu, sigma, atr, current spread) - NaN while warming up or on error
     """
+    state = INDICATOR_STATE
     try:
         # 🚨 Validate inputs
-        if df1.empty or df2.empty or alch_price <= 0 or btc_price <= 0:
-            logger.warning("🚫 Invalid inputs: Empty DF or zero prices")
-            return pd.DataFrame(), 0.0
-
-        # 🧩 Create combined dataframe
-        df = pd.DataFrame({
-            'timestamp': df1['timestamp'],
-            'alch': df1['close'],    # ALCH/USDT closing prices
-            'btc': df2['close']      # BTC/USDT closing prices
-        })
+        if alch_price <= 0 or btc_price <= 0:
+            logger.warning("🚫 Invalid inputs: zero prices")
+            return np.nan, np.nan, np.nan, np.nan
+
+        beta = state.beta
+        logger.debug("🧮 Beta (Hedge Ratio): %.6f", beta)
+
+        # 📊 Spread mean/std over the window, all priced with the current β
+        # (NaN until the windows are full):
+        #   μ  = mean(log ALCH) - β·mean(log BTC)
+        #   σ² = var(log ALCH) - 2β·cov(log ALCH, log BTC) + β²·var(log BTC)
+        n = len(state.logs)
+        if n == LOOKBACK and not math.isnan(beta):
+            mean_x = state.sum_x / n
+            mean_y = state.sum_y / n
+            var_x = (state.sum_xx - state.sum_x * mean_x) / (n - 1)
+            var_y = (state.sum_yy - state.sum_y * mean_y) / (n - 1)
+            cov_xy = (state.sum_xy - state.sum_x * mean_y) / (n - 1)
+            mu = state.log_ref_alch + mean_x - beta * (state.log_ref_btc + mean_y)
+            sigma = math.sqrt(max(var_x - 2 * beta * cov_xy + beta * beta * var_y, 0.0))
+        else:
+            mu = sigma = np.nan
+        atr = state.atr_sum / ATR_PERIOD if len(state.trs) == ATR_PERIOD else np.nan
 
-        # 📈 Log-transform prices for spread calculation
-        df['log_alch'] = np.log(df['alch'])
-        df['log_btc'] = np.log(df['btc'])
+        # 🧮 Calculate current spread using live prices
+        current_spread = math.log(alch_price) - beta * math.log(btc_price)
+        logger.debug("📐 Current Spread: %.6f | σ: %.6f | ATR: %.6f", current_spread, sigma, atr)
 
-        # 🔄 Calculate daily returns (log differences)
-        df['return_alch'] = df['log_alch'].diff()  # ✅ corrected: np.long -> diff()
-        df['return_btc'] = df['log_btc'].diff()   # ✅ corrected: np.log -> diff()
+        return mu, sigma, atr, current_spread
 
-        # 📐 Calculate beta (hedge ratio) using covariance
-        cov_matrix = df[['return_alch', 'return_btc']].cov()
-        beta = cov_matrix.iloc[0, 1] / df['return_btc'].var()  # β = Cov(Alch,Btc) / Var(Btc)
-        logger.info(f"🧮 Beta (Hedge Ratio): {beta:.6f}")
+    except Exception as e:
+        logger.error(f"💥 CRITICAL ERROR in indicator calculation: {str(e)}")
+        logger.error(f"🔍 Bars in window: {len(state.logs)} | last: {state.last_ts}")
+        logger.error(f"💰 ALCH Price: {alch_price} | BTC Price: {btc_price}")
+        return np.nan, np.nan, np.nan, np.nan
 
-        # ⚖️ Calculate spread: log(ALCH) - β * log(BTC)
-        df['spread'] = df['log_alch'] - beta * df['log_btc']
+# %% [markdown]
+# Market Data Streams
 
-        # 📊 Calculate rolling statistics
-        df['mu'] = df['spread'].rolling(LOOKBACK).mean()    # Rolling mean
-        df['sigma'] = df['spread'].rolling(LOOKBACK).std()  # Rolling standard deviation
+# %%
+def _ingest_pending_bars() -> bool:
+    """
+    🧩 Feed klines that have closed on both symbols into the indicator state
 
-        # 🌡️ Calculate True Range (TR) for volatility
-        hl = df1['high'] - df1['low']  # High-Low range
-        hc = (df1['high'] - df1['close'].shift()).abs()  # |High - Prev Close|
-        lc = (df1['low'] - df1['close'].shift()).abs()   # |Low - Prev Close|
-        df['tr'] = pd.concat([hl, hc, lc], axis=1).max(axis=1)  # Max of three values
+    Returns:
+        bool: True if at least one new bar pair was ingested
+    """
+    times = sorted(PENDING_BARS[SYMBOL1].keys() & PENDING_BARS[SYMBOL2].keys())
+    if not times:
+        return False
 
-        # 📏 Calculate Average True Range (ATR)
-        df['atr'] = df['tr'].rolling(ATR_PERIOD).mean()
+    alch = [PENDING_BARS[SYMBOL1].pop(t) for t in times]
+    btc = [PENDING_BARS[SYMBOL2].pop(t) for t in times]
+    ingest_bars(np.array(times, dtype=np.int64),
+                np.array([bar['close'] for bar in alch]),
+                np.array([bar['close'] for bar in btc]),
+                np.array([bar['high'] for bar in alch]),
+                np.array([bar['low'] for bar in alch]))
+    return True
 
-        # 🧮 Calculate current spread using live prices
-        current_spread = np.log(alch_price) - beta * np.log(btc_price)
-        logger.info(f"📐 Current Spread: {current_spread:.6f} | "
-                   f"σ: {df['sigma'].iloc[-1]:.6f} | ATR: {df['atr'].iloc[-1]:.6f}")
 
-        return df, current_spread
+async def backfill_klines(exchange, symbol: str) -> bool:
+    """
+    🩹 Fetch only the bars closed since the last ingested one
+    Used when a kline stream (re)connects, so a dropped socket leaves no gap
+
+    Args:
+        exchange: Connected exchange instance
+        symbol: Trading pair to backfill
 
+    Returns:
+        bool: True if at least one new bar pair was ingested
+    """
+    last_ts = INDICATOR_STATE.last_ts
+    if last_ts is None:
+        return False
+
+    try:
+        ohlcv = await exchange.fetch_ohlcv(symbol, '1m', since=last_ts + BAR_MS, limit=BACKFILL_LIMIT)
     except Exception as e:
-        logger.error(f"💥 CRITICAL ERROR in indicator calculation: {str(e)}")
-        logger.error(f"🔍 ALCH DF: {len(df1)} rows | BTC DF: {len(df2)} rows")
-        logger.error(f"💰 ALCH Price: {alch_price} | BTC Price: {btc_price}")
-        return pd.DataFrame(), 0.0
+        logger.error(f"🩹 Error backfilling {symbol} klines: {str(e)}")
+        return False
+
+    # ⏳ Keep closed candles only
+    now = exchange.milliseconds()
+    for ts, _, high, low, close, _ in ohlcv:
+        if ts + BAR_MS <= now:
+            PENDING_BARS[symbol][ts] = {'high': high, 'low': low, 'close': close}
+    return _ingest_pending_bars()
+
+
+async def stream_klines(exchange, url: str, symbol: str, market_update: asyncio.Event):
+    """
+    🕯️ Consume a 1m kline stream and ingest every closed candle
+    Reconnects automatically when the socket drops, and restarts after
+    STREAM_RETRY_DELAY seconds on any other error
+
+    Args:
+        exchange: Connected exchange instance, used to backfill on (re)connect
+        url: Binance Futures kline stream endpoint
+        symbol: Trading pair the stream belongs to
+        market_update: Event set whenever a new bar pair reaches the indicator state
+    """
+    while True:
+        try:
+            async for ws in websockets.connect(url):
+                # 🩹 Catch up on bars that closed while the stream was down
+                if await backfill_klines(exchange, symbol):
+                    market_update.set()
+
+                try:
+                    async for msg in ws:
+                        k = orjson.loads(msg)['k']
+
+                        # ⏳ Skip updates of the still-forming candle
+                        if not k['x']:
+                            continue
+
+                        PENDING_BARS[symbol][k['t']] = {
+                            'high': float(k['h']),
+                            'low': float(k['l']),
+                            'close': float(k['c']),
+                        }
+                        if _ingest_pending_bars():
+                            market_update.set()
+
+                except websockets.ConnectionClosed:
+                    logger.warning(f"🔌 Kline stream for {symbol} closed - reconnecting")
+
+        except Exception as e:
+            # 🛟 Never let the task die - the strategy would stop receiving bars
+            logger.error(f"💥 Kline stream for {symbol} failed - retrying in {STREAM_RETRY_DELAY}s: {str(e)}")
+            await asyncio.sleep(STREAM_RETRY_DELAY)
+
+
+async def stream_depth(url: str, symbol: str, tick: float, market_update: asyncio.Event):
+    """
+    📡 Keep QUOTES[symbol] at the top of book of a depth stream
+    Prices are stored as int64 multiples of the tick size, so validation
+    is exact integer comparison. Reconnects automatically when the socket drops,
+    and restarts after STREAM_RETRY_DELAY seconds on any other error
+
+    Args:
+        url: Binance Futures partial depth stream endpoint
+        symbol: Trading pair the stream belongs to
+        tick: Price tick size of the symbol
+        market_update: Event set whenever the top of book changes
+    """
+    while True:
+        try:
+            async for ws in websockets.connect(url):
+                try:
+                    async for msg in ws:
+                        depth = orjson.loads(msg)
+
+                        # 🎯 Best bid / best ask from the top levels, in ticks
+                        bid = round(float(depth['b'][0][0]) / tick) if depth['b'] else 0
+                        ask = round(float(depth['a'][0][0]) / tick) if depth['a'] else 0
+
+                        # ⚠️ Validate quotes
+                        if not (0 < bid <= ask):
+                            logger.warning("🚨 Invalid quotes for %s: bid=%s, ask=%s", symbol, bid * tick, ask * tick)
+                            continue
+
+                        if QUOTES.get(symbol) != (bid, ask):
+                            QUOTES[symbol] = (bid, ask)
+                            market_update.set()
+
+                except websockets.ConnectionClosed:
+                    logger.warning(f"🔌 Depth stream for {symbol} closed - reconnecting")
+
+        except Exception as e:
+            # 🛟 Never let the task die - the strategy would trade on frozen quotes
+            logger.error(f"💥 Depth stream for {symbol} failed - retrying in {STREAM_RETRY_DELAY}s: {str(e)}")
+            QUOTES.pop(symbol, None)  # Stale quotes make the main loop wait instead of trade
+            await asyncio.sleep(STREAM_RETRY_DELAY)
 
 # %% [markdown]
 # Arbitrage Signal
@@ -220,25 +665,26 @@ def get_arbitrage_signal(spread: float, mu: float, sigma: float) -> str:
         str: Trading signal ('bullish', 'bearish', or 'neutral')
     """
     try:
-        # 🚨 Validate inputs for NaN/None
-        if any(pd.isna(x) for x in [spread, mu, sigma]):
+        # 🚨 Validate inputs for NaN
+        if math.isnan(spread) or math.isnan(mu) or math.isnan(sigma):
             logger.warning("⚠️ NaN values in signal inputs - returning neutral")
             return 'neutral'
 
         # 🧮 Calculate deviation thresholds
-        lower_bound = mu - SIGMA_THRESHOLD * sigma
-        upper_bound = mu + SIGMA_THRESHOLD * sigma
+        threshold = SIGMA_THRESHOLD * sigma
+        lower_bound = mu - threshold
+        upper_bound = mu + threshold
 
         # 📊 Generate signals based on spread position
         if spread < lower_bound:
-            logger.info(f"🐂 BULLISH Signal | Spread: {spread:.6f} < μ-{SIGMA_THRESHOLD}σ ({lower_bound:.6f})")
+            logger.debug("🐂 BULLISH Signal | Spread: %.6f < μ-%sσ (%.6f)", spread, SIGMA_THRESHOLD, lower_bound)
             return 'bullish'
         elif spread > upper_bound:
-            logger.info(f"🐻 BEARISH Signal | Spread: {spread:.6f} > μ+{SIGMA_THRESHOLD}σ ({upper_bound:.6f})")
+            logger.debug("🐻 BEARISH Signal | Spread: %.6f > μ+%sσ (%.6f)", spread, SIGMA_THRESHOLD, upper_bound)
             return 'bearish'
 
         # 📍 Neutral zone
-        logger.debug(f"➖ NEUTRAL | Spread: {spread:.6f} ∈ [μ-σ: {lower_bound:.6f}, μ+σ: {upper_bound:.6f}]")
+        logger.debug("➖ NEUTRAL | Spread: %.6f ∈ [μ-σ: %.6f, μ+σ: %.6f]", spread, lower_bound, upper_bound)
         return 'neutral'
 
     except Exception as e:
@@ -246,6 +692,123 @@ def get_arbitrage_signal(spread: float, mu: float, sigma: float) -> str:
         logger.error(f"🔍 Spread: {spread} | μ: {mu} | σ: {sigma}")
         return 'neutral'
 
+# %% [markdown]
+# Batch Orders
+
+# %%
+def batch_market_order(exchange, symbol: str, side: str, qty: float) -> dict:
+    """
+    🧾 Build a MARKET order entry for Binance Futures batchOrders
+
+    Args:
+        exchange: Connected exchange instance (markets loaded)
+        symbol: Trading pair (e.g., 'ALCH/USDT')
+        side: 'BUY' or 'SELL'
+        qty: Order quantity in base currency
+
+    Returns:
+        dict: Raw batchOrders entry
+    """
+    return {
+        'symbol': exchange.market_id(symbol),
+        'side': side,
+        'type': 'MARKET',
+        'quantity': exchange.amount_to_precision(symbol, qty),
+    }
+
+
+async def submit_batch(exchange, orders: list) -> list:
+    """
+    📦 Submit up to BATCH_ORDER_LIMIT orders in one POST /fapi/v1/batchOrders
+    round trip instead of one request per order
+
+    Args:
+        exchange: Connected exchange instance
+        orders: Entries built with batch_market_order
+
+    Returns:
+        list: Per-order results in request order; failed entries carry
+              'code' and 'msg' instead of an 'orderId'
+    """
+    return await exchange.fapiPrivatePostBatchOrders({
+        'batchOrders': orjson.dumps(orders).decode()
+    })
+
+
+def batch_error(result: dict):
+    """
+    🚨 Error message of a failed batchOrders entry, or None if it was accepted
+    """
+    if 'orderId' in result:
+        return None
+    return f"{result.get('code')}: {result.get('msg')}"
+
+
+async def submit_with_hedge(exchange, symbol: str, side: str, qty: float,
+                            hedge_symbol: str, hedge_side: str, hedge_qty: float) -> tuple:
+    """
+    📦 Send a primary leg and its hedge in one batchOrders request
+    Each entry is built on its own: if the hedge can't be built (e.g. its
+    quantity rounds to zero at the market's step size) the primary goes out
+    alone and the hedge error is logged. A hedge accepted alongside a rejected
+    primary is unwound
+
+    Args:
+        exchange: Connected exchange instance
+        symbol: Primary trading pair
+        side: Primary side ('BUY' or 'SELL')
+        qty: Primary quantity
+        hedge_symbol: Hedge trading pair
+        hedge_side: Hedge side ('BUY' or 'SELL')
+        hedge_qty: Hedge quantity
+
+    Returns:
+        tuple: (primary result, hedge result or None if no hedge was sent)
+
+    Raises:
+        ccxt.ExchangeError: The primary leg was rejected
+    """
+    orders = [batch_market_order(exchange, symbol, side, qty)]
+    try:
+        orders.append(batch_market_order(exchange, hedge_symbol, hedge_side, hedge_qty))
+    except Exception as e:
+        logger.error(f"⚖️❌ Hedge order failed: {str(e)}")
+
+    results = await submit_batch(exchange, orders)
+    order = results[0]
+    hedge = results[1] if len(orders) == 2 else None
+
+    error = batch_error(order)
+    if error:
+        if hedge is not None and batch_error(hedge) is None:
+            await unwind_hedge(exchange, hedge_symbol, hedge_side, hedge, hedge_qty, error)
+        raise ccxt.ExchangeError(error)
+    return order, hedge
+
+
+async def unwind_hedge(exchange, symbol: str, side: str, hedge: dict, qty: float, reason: str):
+    """
+    ↩️ Close a hedge that was filled while its primary leg was rejected
+    batchOrders is not atomic, so without this the hedge stays open untracked
+
+    Args:
+        exchange: Connected exchange instance
+        symbol: Hedge trading pair
+        side: Side the hedge was opened with ('BUY' or 'SELL')
+        hedge: Accepted batchOrders result of the hedge
+        qty: Requested hedge quantity, used if the result carries no origQty
+        reason: Rejection message of the primary leg
+    """
+    qty = float(hedge.get('origQty', qty))
+    logger.error(f"⚖️❌ Primary leg rejected ({reason}) but hedge {side} {qty} {symbol} "
+                 f"was accepted - unwinding")
+    try:
+        await exchange.create_market_order(symbol, 'buy' if side == 'SELL' else 'sell', qty,
+                                           params={'reduceOnly': True})
+        logger.info(f"↩️ Hedge unwound | {symbol} | Qty: {qty:.6f}")
+    except Exception as e:
+        logger.error(f"🚨 Failed to unwind hedge {side} {qty} {symbol}: {str(e)} - close it manually")
+
 # %% [markdown]
 # Manage Position
 
@@ -260,78 +823,74 @@ async def manage_positions(exchange, current_price: float, symbol: str):
         current_price: Current market price for the symbol
         symbol: Trading pair (e.g., 'ALCH/USDT')
     """
-    global OPEN_POSITIONS
+    positions = OPEN_POSITIONS
     positions_to_remove = []
 
     try:
-        logger.info(f"🔍 Checking {len(OPEN_POSITIONS)} positions for {symbol}")
-
-        for pos in OPEN_POSITIONS:
-            # Filter positions for current symbol
-            if pos['symbol'] != symbol:
-                continue
-
+        logger.debug("🔍 Checking %d positions for %s", len(positions), symbol)
+
+        # 🎯 Vectorized TP/SL check: side * (price - level) is >= 0 past TP, <= 0 past SL
+        n = positions.n
+        side = positions.side[:n]
+        on_symbol = positions.symbol[:n] == symbol
+        tp_hit = on_symbol & (side * (current_price - positions.tp[:n]) >= 0)
+        sl_hit = on_symbol & ~tp_hit & (side * (current_price - positions.sl[:n]) <= 0)
+
+        hits = np.flatnonzero(tp_hit | sl_hit)
+        close_orders = []
+        closing = []  # Position indices matching close_orders
+        for i in hits:
             # 📊 Extract position details
-            entry_price = pos['entry_price']
-            qty = pos['quantity']
-            side = pos['side']
-            tp_price = pos['tp_price']
-            sl_price = pos['sl_price']
+            entry_price = positions.entry[i]
+            qty = positions.qty[i]
+            is_long = positions.side[i] == 1
+            side_name = 'long' if is_long else 'short'
 
             # 💰 Calculate P&L
             leverage = LEVERAGE  # Corrected spelling
-            if side == 'long':
-                profit = (current_price - entry_price) * qty * leverage
-            else:  # short position
-                profit = (entry_price - current_price) * qty * leverage
+            profit = positions.side[i] * (current_price - entry_price) * qty * leverage
+
+            if tp_hit[i]:
+                # ✅ TP hit - close with profit
+                logger.info(f"✅ {side_name.upper()} TP HIT | {symbol} | "
+                           f"Entry: {entry_price:.6f} | Exit: {current_price:.6f} | "
+                           f"Profit: {profit:.4f} USDT")
+            else:
+                # ❌ SL hit - close with loss
+                logger.info(f"❌ {side_name.upper()} SL HIT | {symbol} | "
+                           f"Entry: {entry_price:.6f} | Exit: {current_price:.6f} | "
+                           f"Loss: {abs(profit):.4f} USDT")
+
+            # 🟢 LONG closes with a sell, 🔴 SHORT closes with a buy
+            # (built one by one so a bad quantity only skips its own close)
+            try:
+                close_orders.append(batch_market_order(exchange, symbol, 'SELL' if is_long else 'BUY', qty))
+                closing.append(i)
+            except Exception as e:
+                logger.error(f"💥 Error closing position for {symbol}: {str(e)}")
 
+        # 📦 Close every triggered position in as few round trips as possible
+        for start in range(0, len(closing), BATCH_ORDER_LIMIT):
+            batch = closing[start:start + BATCH_ORDER_LIMIT]
             try:
-                # 🟢 LONG position management
-                if side == 'long':
-                    if current_price >= tp_price:
-                        # ✅ TP hit - close with profit
-                        logger.info(f"✅ LONG TP HIT | {symbol} | "
-                                   f"Entry: {entry_price:.6f} | Exit: {current_price:.6f} | "
-                                   f"Profit: {profit:.4f} USDT")
-                        await exchange.create_market_sell_order(symbol, qty)
-                        positions_to_remove.append(pos)
-
-                    elif current_price <= sl_price:
-                        # ❌ SL hit - close with loss
-                        logger.info(f"❌ LONG SL HIT | {symbol} | "
-                                   f"Entry: {entry_price:.6f} | Exit: {current_price:.6f} | "
-                                   f"Loss: {abs(profit):.4f} USDT")
-                        await exchange.create_market_sell_order(symbol, qty)
-                        positions_to_remove.append(pos)
-
-                # 🔴 SHORT position management
-                elif side == 'short':
-                    if current_price <= tp_price:
-                        # ✅ TP hit - close with profit
-                        logger.info(f"✅ SHORT TP HIT | {symbol} | "
-                                   f"Entry: {entry_price:.6f} | Exit: {current_price:.6f} | "
-                                   f"Profit: {profit:.4f} USDT")
-                        await exchange.create_market_buy_order(symbol, qty)
-                        positions_to_remove.append(pos)
-
-                    elif current_price >= sl_price:
-                        # ❌ SL hit - close with loss
-                        logger.info(f"❌ SHORT SL HIT | {symbol} | "
-                                   f"Entry: {entry_price:.6f} | Exit: {current_price:.6f} | "
-                                   f"Loss: {abs(profit):.4f} USDT")
-                        await exchange.create_market_buy_order(symbol, qty)
-                        positions_to_remove.append(pos)
+                results = await submit_batch(exchange, close_orders[start:start + BATCH_ORDER_LIMIT])
+                for i, result in zip(batch, results):
+                    error = batch_error(result)
+                    if error:
+                        logger.error(f"💥 Error closing position for {symbol}: {error}")
+                    else:
+                        positions_to_remove.append(i)
 
             except ccxt.InsufficientFunds:
-                logger.error(f"💸 Insufficient funds to close {side} position for {symbol}")
+                logger.error(f"💸 Insufficient funds to close positions for {symbol}")
             except ccxt.NetworkError:
-                logger.warning(f"🌐 Network error closing {side} position - will retry")
+                logger.warning("🌐 Network error closing positions - will retry")
             except Exception as e:
-                logger.error(f"💥 Error closing {side} position: {str(e)}")
+                logger.error(f"💥 Error closing positions: {str(e)}")
 
         # 🗑️ Remove closed positions
-        OPEN_POSITIONS = [pos for pos in OPEN_POSITIONS if pos not in positions_to_remove]
-        logger.info(f"📊 Open positions: {len(OPEN_POSITIONS)}")
+        positions.remove(positions_to_remove)
+        logger.debug("📊 Open positions: %d", len(positions))
 
     except Exception as e:
         logger.error(f"💥 CRITICAL position management error: {str(e)}")
@@ -341,10 +900,10 @@ async def manage_positions(exchange, current_price: float, symbol: str):
 # Place Order
 
 # %%
-async def place_order(exchange, signal: str, price: float, atr: float, symbol: str):
+async def place_order(exchange, signal: str, price: float, atr: float, symbol: str, hedge_price: float):
     """
     📤 Place new orders based on trading signals with hedging
-    Manages position opening and automatic hedging in correlated pair
+    Primary leg and hedge in the correlated pair go out in one batch request
 
     Args:
         exchange: Connected exchange instance
@@ -352,88 +911,67 @@ async def place_order(exchange, signal: str, price: float, atr: float, symbol: s
         price: Current market price for entry
         atr: Current Average True Range value
         symbol: Trading pair (e.g., 'ALCH/USDT')
+        hedge_price: Current market price of the hedge pair (SYMBOL2)
     """
-    global OPEN_POSITIONS
-
     try:
         # 🚨 Validate inputs
-        if price <= 0 or atr <= 0 or np.isnan(atr):
+        if price <= 0 or atr <= 0 or math.isnan(atr):
             logger.warning("⚠️ Invalid order parameters - price or ATR invalid")
             return
 
-        # 🛑 Check position limit
+        # 🛑 Check position limit (hit on every tick while a signal persists)
         if len(OPEN_POSITIONS) >= MAX_POSITION:
-            logger.info("🚫 MAX positions reached - skipping new order")
+            logger.debug("🚫 MAX positions reached - skipping new order")
             return
 
         # 🧮 Calculate position size
         qty = RISK_AMOUNT / price
-        logger.info(f"🧾 {signal.upper()} Signal | {symbol} | Price: {price:.6f} | Qty: {qty:.6f}")
+        hedge_symbol = SYMBOL2
+        hedge_qty = (qty * price) / hedge_price
+        logger.info("🧾 %s Signal | %s | Price: %.6f | Qty: %.6f", signal.upper(), symbol, price, qty)
 
         try:
             if signal == 'bullish':
-                # 🟢 Open LONG position
-                await exchange.create_market_buy_order(symbol, qty)
+                # 🟢 Open LONG position + ⚖️ HEDGE SHORT on correlated pair (SYMBOL2)
+                order, hedge = await submit_with_hedge(exchange, symbol, 'BUY', qty,
+                                                       hedge_symbol, 'SELL', hedge_qty)
 
                 # 📊 Set TP/SL prices
                 tp_price = price + TP_MULTIPLIER * atr
                 sl_price = price - SL_MULTIPLIER * atr
 
                 # 📝 Record position
-                position = {
-                    'symbol': symbol,
-                    'side': 'long',
-                    'entry_price': price,
-                    'quantity': qty,
-                    'tp_price': tp_price,
-                    'sl_price': sl_price
-                }
-                OPEN_POSITIONS.append(position)
+                OPEN_POSITIONS.add(symbol, 1, price, qty, tp_price, sl_price)
                 logger.info(f"🟢 OPENED LONG | {symbol} | Entry: {price:.6f} | "
                            f"TP: {tp_price:.6f} | SL: {sl_price:.6f}")
 
-                # ⚖️ HEDGE with SHORT on correlated pair (SYMBOL2)
-                try:
-                    hedge_symbol = SYMBOL2
-                    hedge_price = (await exchange.fetch_ticker(hedge_symbol))['last']
-                    hedge_qty = (qty * price) / hedge_price
-                    await exchange.create_market_sell_order(hedge_symbol, hedge_qty)
+                error = batch_error(hedge) if hedge is not None else None
+                if error:
+                    logger.error(f"⚖️❌ Hedge order failed: {error}")
+                elif hedge is not None:
                     logger.info(f"⚖️ HEDGE SHORT | {hedge_symbol} | Qty: {hedge_qty:.6f} | "
                                f"Price: {hedge_price:.6f}")
-                except Exception as e:
-                    logger.error(f"⚖️❌ Hedge order failed: {str(e)}")
 
             elif signal == 'bearish':
-                # 🔴 Open SHORT position
-                await exchange.create_market_sell_order(symbol, qty)
+                # 🔴 Open SHORT position + ⚖️ HEDGE LONG on correlated pair (SYMBOL2)
+                order, hedge = await submit_with_hedge(exchange, symbol, 'SELL', qty,
+                                                       hedge_symbol, 'BUY', hedge_qty)
 
                 # 📊 Set TP/SL prices
                 tp_price = price - TP_MULTIPLIER * atr
                 sl_price = price + SL_MULTIPLIER * atr
 
                 # 📝 Record position
-                position = {
-                    'symbol': symbol,
-                    'side': 'short',
-                    'entry_price': price,
-                    'quantity': qty,
-                    'tp_price': tp_price,
-                    'sl_price': sl_price
-                }
-                OPEN_POSITIONS.append(position)
+                OPEN_POSITIONS.add(symbol, -1, price, qty, tp_price, sl_price)
                 logger.info(f"🔴 OPENED SHORT | {symbol} | Entry: {price:.6f} | "
                            f"TP: {tp_price:.6f} | SL: {sl_price:.6f}")
 
-                # ⚖️ HEDGE with LONG on correlated pair (SYMBOL2)
-                try:
-                    hedge_symbol = SYMBOL2
-                    hedge_price = (await exchange.fetch_ticker(hedge_symbol))['last']
-                    hedge_qty = (qty * price) / hedge_price
-                    await exchange.create_market_buy_order(hedge_symbol, hedge_qty)
+                error = batch_error(hedge) if hedge is not None else None
+                if error:
+                    logger.error(f"⚖️❌ Hedge order failed: {error}")
+                elif hedge is not None:
                     logger.info(f"⚖️ HEDGE LONG | {hedge_symbol} | Qty: {hedge_qty:.6f} | "
                               f"Price: {hedge_price:.6f}")
-                except Exception as e:
-                    logger.error(f"⚖️❌ Hedge order failed: {str(e)}")
 
         except ccxt.InsufficientFunds:
             logger.error("💸❌ Insufficient funds to open position")
@@ -458,12 +996,24 @@ async def main():
     Manages exchange connection, market data processing, and trading decisions
     """
     exchange = None
+    session = None
+    streams = []
     try:
+        # 🌐 Pooled keep-alive HTTP session so REST calls reuse warm TCP/TLS connections
+        session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(
+            limit=64,
+            ttl_dns_cache=300,
+            keepalive_timeout=75,
+            enable_cleanup_closed=True,
+        ))
+
         # 🏦 Initialize exchange connection
         exchange = ccxt.binance({
             'apiKey': api_key,
             'secret': api_secret,
             'enableRateLimit': True,
+            'timeout': 5000,      # Fail fast (ms) instead of stalling the loop
+            'session': session,
             'options': {
                 'defaultType': 'future',
                 'recvWindow': 10000,
@@ -473,72 +1023,85 @@ async def main():
         logger.info("🔌 Connecting to Binance Futures...")
         await exchange.load_markets()
         logger.info(f"📊 Loaded {len(exchange.markets)} markets")
+        for symbol in (SYMBOL1, SYMBOL2):
+            TICK_SIZES[symbol] = exchange.markets[symbol]['precision']['price']
 
         # 🎚️ Set leverage for both symbols
-        await exchange.set_leverage(LEVERAGE, SYMBOL1)
-        await exchange.set_leverage(LEVERAGE, SYMBOL2)
+        await asyncio.gather(
+            exchange.set_leverage(LEVERAGE, SYMBOL1),
+            exchange.set_leverage(LEVERAGE, SYMBOL2)
+        )
         logger.info(f"⚖️ Leverage set to {LEVERAGE}x for {SYMBOL1} and {SYMBOL2}")
 
+        # 🌱 Warm up the indicator state from REST history once
+        df1, df2 = await asyncio.gather(
+            fetch_data(exchange, SYMBOL1, '1m', 1000),
+            fetch_data(exchange, SYMBOL2, '1m', 1000)
+        )
+        if len(df1) < LOOKBACK or len(df2) < LOOKBACK:
+            logger.warning(f"⚠️ Insufficient data: {SYMBOL1}={len(df1)}, {SYMBOL2}={len(df2)} < {LOOKBACK} "
+                           f"- indicators will warm up from the kline stream")
+        if not df1.empty and not df2.empty:
+            ingest_bars(*history_bars(df1, df2))
+
+        # 📡 Start market data streams
+        market_update = asyncio.Event()
+        streams = [
+            asyncio.create_task(stream_klines(exchange, WS_KLINE_URL1, SYMBOL1, market_update)),
+            asyncio.create_task(stream_klines(exchange, WS_KLINE_URL2, SYMBOL2, market_update)),
+            asyncio.create_task(stream_depth(WS_URL1, SYMBOL1, TICK_SIZES[SYMBOL1], market_update)),
+            asyncio.create_task(stream_depth(WS_URL2, SYMBOL2, TICK_SIZES[SYMBOL2], market_update)),
+        ]
+
         # 📈 Main trading loop
         logger.info("🚀 Starting trading algorithm")
+        tick_count = 0
+        last_signal = 'neutral'
         while True:
             try:
-                # 📥 Fetch OHLCV data
-                df1 = await fetch_data(exchange, SYMBOL1, '1m', 1000)
-                df2 = await fetch_data(exchange, SYMBOL2, '1m', 1000)
-
-                # 🚨 Check data sufficiency
-                if len(df1) < LOOKBACK or len(df2) < LOOKBACK:
-                    logger.warning(f"⚠️ Insufficient data: {SYMBOL1}={len(df1)}, {SYMBOL2}={len(df2)} < {LOOKBACK}")
-                    await asyncio.sleep(CHECK_INTERVAL)
-                    continue
-
-                # 💹 Fetch real-time quotes
-                bid1, ask1 = await fetch_quotes(exchange, SYMBOL1)
-                bid2, ask2 = await fetch_quotes(exchange, SYMBOL2)
+                # ⏰ Sleep until a stream delivers a new bar or a top-of-book change
+                await market_update.wait()
+                market_update.clear()
 
-                # ✅ Validate market prices
-                if (bid1 <= 0 or ask1 == float('inf') or
-                    bid2 <= 0 or ask2 == float('inf')):
-                    logger.warning("⚠️ Invalid market prices - skipping iteration")
-                    await asyncio.sleep(CHECK_INTERVAL)
+                # 💹 Read real-time quotes from the depth streams
+                if SYMBOL1 not in QUOTES or SYMBOL2 not in QUOTES:
+                    logger.warning("⚠️ Waiting for order book streams - skipping iteration")
                     continue
+                bid1, ask1 = QUOTES[SYMBOL1]
+                bid2, ask2 = QUOTES[SYMBOL2]
 
-                # 🧮 Calculate mid prices
-                price1 = (bid1 + ask1) / 2
-                price2 = (bid2 + ask2) / 2
-                logger.debug(f"💰 {SYMBOL1}: {price1:.6f} | {SYMBOL2}: {price2:.6f}")
+                # 🧮 Calculate mid prices (quotes are in ticks)
+                price1 = (bid1 + ask1) * TICK_SIZES[SYMBOL1] / 2
+                price2 = (bid2 + ask2) * TICK_SIZES[SYMBOL2] / 2
+                logger.debug("💰 %s: %.6f | %s: %.6f", SYMBOL1, price1, SYMBOL2, price2)
 
-                # 📊 Calculate indicators
-                df_indicator, spread = calculate_indicator(df1, df2, price1, price2)
+                # 📊 Calculate indicators (mu, sigma, atr come straight from the rolling state)
+                mu, sigma, atr, spread = calculate_indicator(price1, price2)
 
                 # 🚫 Skip if indicator calculation failed
-                if df_indicator.empty:
+                if math.isnan(spread):
                     logger.warning("⚠️ Indicator calculation failed - skipping")
-                    await asyncio.sleep(CHECK_INTERVAL)
                     continue
 
-                # 📈 Extract latest indicator values
-                mu = df_indicator['mu'].iloc[-1]
-                sigma = df_indicator['sigma'].iloc[-1]  # ✅ Fixed 'sima' typo
-                atr = df_indicator['atr'].iloc[-1]
-
                 # 📶 Get trading signal
                 signal = get_arbitrage_signal(spread, mu, sigma)  # ✅ Fixed 'aritrage' typo
+                if signal != last_signal:
+                    logger.info("🚨 NEW %s SIGNAL DETECTED | Spread: %.6f | μ: %.6f | σ: %.6f",
+                                signal.upper(), spread, mu, sigma)
+                    last_signal = signal
 
                 # 🧾 Manage existing positions
                 await manage_positions(exchange, price1, SYMBOL1)
 
                 # 🆕 Place new order if valid signal
                 if signal != 'neutral':
-                    logger.info(f"🚨 NEW {signal.upper()} SIGNAL DETECTED")
-                    await place_order(exchange, signal, price1, atr, SYMBOL1)
-
-                # 📝 Status update
-                logger.info(f"📈 {SYMBOL1}: {price1:.6f} | Spread: {spread:.6f} | "
-                          f"μ: {mu:.6f} | σ: {sigma:.6f} | ATR: {atr:.6f} | Signal: {signal}")
+                    await place_order(exchange, signal, price1, atr, SYMBOL1, price2)
 
-                await asyncio.sleep(CHECK_INTERVAL)
+                # 📝 Status update every STATUS_LOG_EVERY ticks
+                tick_count += 1
+                if tick_count % STATUS_LOG_EVERY == 0:
+                    logger.info("📈 %s: %.6f | Spread: %.6f | μ: %.6f | σ: %.6f | ATR: %.6f | Signal: %s",
+                                SYMBOL1, price1, spread, mu, sigma, atr, signal)
 
             except KeyboardInterrupt:
                 logger.info("🛑 Interrupted by user — shutting down gracefully...")
@@ -552,10 +1115,14 @@ async def main():
         logger.error(f"💥 CRITICAL initialization error: {str(e)}")
         traceback.print_exc()
     finally:
+        for task in streams:
+            task.cancel()
         if exchange:
             logger.info("🔌 Closing exchange connection")
             await exchange.close()
             logger.info("✅ Exchange connection closed")
+        if session:
+            await session.close()  # Passed in, so ccxt leaves closing it to us
 
 if __name__ == "__main__":
     try:
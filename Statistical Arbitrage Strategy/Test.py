@@ -1,11 +1,14 @@
-import ccxt.async_support as ccxt
+import ccxt.pro as ccxt
 import pandas as pd
 import numpy as np
 import asyncio
 import logging
+import math
 import os
 import time
+from collections import deque
 from dotenv import load_dotenv
+from numba import njit
 import pandas as pd
 
 # Load environment variables
@@ -41,136 +44,290 @@ SL_MULTIPLIER = 1.0
 FEE_RATE = 0.002
 MAX_POSITION = 2
 CHECK_INTERVAL = 1.0  # Increased for safety
+BAR_MS = 60_000       # 1m candle length in milliseconds
+BETA_WINDOW = 1000    # Closed-bar log-return pairs in the hedge ratio window
 
-OPEN_POSITIONS = []
+class Positions:
+    """
+    Open positions stored as parallel numpy arrays (structure of arrays),
+    so TP/SL checks run as one vectorized comparison across all positions.
+    """
 
-async def fetch_data(exchange, symbol: str, timeframe: str, limit: int = 100) -> pd.DataFrame:
+    def __init__(self, capacity: int = 16):
+        self.n = 0                                      # Number of live positions
+        self.entry = np.empty(capacity)                 # Entry prices
+        self.qty = np.empty(capacity)                   # Quantities
+        self.tp = np.empty(capacity)                    # Take-profit prices
+        self.sl = np.empty(capacity)                    # Stop-loss prices
+        self.side = np.empty(capacity, dtype=np.int8)   # 1 long, -1 short
+        self.symbol = np.empty(capacity, dtype=object)  # Trading pair symbols
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _arrays(self) -> tuple:
+        return self.entry, self.qty, self.tp, self.sl, self.side, self.symbol
+
+    def add(self, symbol: str, side: int, entry_price: float, quantity: float,
+            tp_price: float, sl_price: float):
+        # Double capacity when full
+        if self.n == len(self.entry):
+            self.entry, self.qty, self.tp, self.sl, self.side, self.symbol = (
+                np.concatenate([arr, np.empty_like(arr)]) for arr in self._arrays())
+        i = self.n
+        self.entry[i] = entry_price
+        self.qty[i] = quantity
+        self.tp[i] = tp_price
+        self.sl[i] = sl_price
+        self.side[i] = side
+        self.symbol[i] = symbol
+        self.n += 1
+
+    def remove(self, indices):
+        # Compact the surviving rows to the front of each array
+        if len(indices) == 0:
+            return
+        # Rows before the first removed index are already in place
+        first = int(np.min(indices))
+        keep = np.ones(self.n - first, dtype=bool)
+        keep[np.asarray(indices) - first] = False
+        k = first + int(keep.sum())
+        for arr in self._arrays():
+            arr[first:k] = arr[first:self.n][keep]
+        self.symbol[k:self.n] = None
+        self.n = k
+
+OPEN_POSITIONS = Positions()
+QUOTES = {}  # Latest (bid, ask) per symbol, kept current by the order book watchers
+
+# Persistent OHLCV buffers per symbol, rows of [timestamp_ms, open, high, low, close, volume]
+_OHLCV = {}
+
+async def fetch_data(exchange, symbol: str, timeframe: str, limit: int = 100) -> np.ndarray:
+    """
+    Return the latest `limit` OHLCV rows for `symbol` as a float64 array.
+    The first call fetches the full window; later calls only fetch bars from
+    the last (still forming) one onwards and splice them onto the buffer.
+    """
     try:
-        ohlcv = await exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        return df
+        buf = _OHLCV.get(symbol)
+        if buf is None:
+            ohlcv = await exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            buf = np.empty((0, 6))
+        else:
+            ohlcv = await exchange.fetch_ohlcv(symbol, timeframe, since=int(buf[-1, 0]), limit=limit)
+
+        if ohlcv:
+            new = np.asarray(ohlcv, dtype=np.float64)
+            buf = np.concatenate((buf[buf[:, 0] < new[0, 0]], new))[-limit:]
+            _OHLCV[symbol] = buf
+        return buf
     except Exception as e:
         logger.error(f"Error fetching OHLCV data for {symbol}: {str(e)}")
-        return pd.DataFrame()
+        return np.empty((0, 6))
 
-# async def fetch_quotes(exchange, symbol: str) -> tuple:
-    try:
-        ticker = await exchange.fetch_ticker(symbol)
-        order_book = await exchange.fetch_order_book('BTC/USDT')
-        bid = order_book['bids'][0][0] if order_book['bids'] else None
-        ask = order_book['asks'][0][0] if order_book['asks'] else None
-        if bid is None or ask is None:
-            logger.warning(f"Order book empty for BTC/USDT: bid={bid}, ask={ask}")
-        else:
-            logger.info(f"Bid: {bid}, Ask: {ask}, Spread: {ask-bid}")
-
-        print(f"Ticker for {symbol}: {ticker}")  # Debugging line
-        bid = ticker.get('bid', 0.0)
-        ask = ticker.get('ask', float('inf'))
-
-        # Validate prices
-        if bid is None or ask is None or bid <= 0 or ask <= 0:
-            logger.warning(f"Invalid bid/ask for {symbol}: bid={bid}, ask={ask}")
-            return 0.0, float('inf')
-        if bid is None or ask is None or bid <= 0 or ask <= 0:
-            logger.warning(f"Invalid bid/ask for {symbol}: bid={bid}, ask={ask}")
-            return 0.0, float('inf')
-
-        if bid <= 0 or ask <= 0 or bid > ask:
-            logger.warning(f"Invalid quotes for {symbol}: bid={bid}, ask={ask}")
-            return 0.0, float('inf')
-
-        return bid, ask
-    except ccxt.BaseError as e:
-        logger.error(f"Exchange error fetching {symbol}: {str(e)}")
-        return 0.0, float('inf')
-    except Exception as e:
-        logger.error(f"General error fetching {symbol}: {str(e)}")
-        return 0.0, float('inf')
+async def watch_quotes(exchange, symbol: str):
+    """
+    Keep QUOTES[symbol] at the top of book pushed by ccxt.pro's order book
+    stream. ccxt handles the websocket and reconnects; errors are logged and
+    the watch is retried.
+    """
+    while True:
+        try:
+            order_book = await exchange.watch_order_book(symbol)
+            if not order_book['bids'] or not order_book['asks']:
+                continue
+            bid = order_book['bids'][0][0]
+            ask = order_book['asks'][0][0]
 
-async def fetch_quotes(exchange, symbol: str) -> tuple:
-    try:
-        order_book = await exchange.fetch_order_book(symbol)
-        bid = order_book['bids'][0][0] if order_book['bids'] else 0.0
-        ask = order_book['asks'][0][0] if order_book['asks'] else float('inf')
+            if not (0 < bid <= ask):
+                logger.warning(f"Invalid quotes for {symbol}: bid={bid}, ask={ask}")
+                continue
 
-        if bid <= 0 or ask <= 0 or bid > ask:
-            logger.warning(f"Invalid quotes for {symbol}: bid={bid}, ask={ask}")
-            return 0.0, float('inf')
+            QUOTES[symbol] = (bid, ask)
 
-        logger.info(f"Bid: {bid}, Ask: {ask}, Spread: {ask-bid}")
-        return bid, ask
+        except Exception as e:
+            logger.warning(f"Order book watch for {symbol} failed - retrying: {str(e)}")
+            await asyncio.sleep(CHECK_INTERVAL)
 
-    except ccxt.BaseError as e:
-        logger.error(f"Exchange error fetching {symbol}: {str(e)}")
-        return 0.0, float('inf')
-    except Exception as e:
-        logger.error(f"General error fetching {symbol}: {str(e)}")
-        return 0.0, float('inf')
+def get_quotes(symbol: str) -> tuple:
+    # Latest streamed quotes, or the invalid sentinel until the first update arrives
+    return QUOTES.get(symbol, (0.0, float('inf')))
 
 
-def calculate_indicator(
-    df1: pd.DataFrame,
-    df2: pd.DataFrame,
-    price1: float,
-    price2: float
-) -> tuple:
-    try:
-        # Validate inputs
-        if df1.empty or df2.empty or price1 <= 0 or price2 <= 0:
-            return pd.DataFrame(), 0.0
+class BetaTracker:
+    """
+    Hedge ratio from running sums over the last `window` closed-bar log-return
+    pairs, so each new bar is an O(1) update instead of a full covariance.
+    """
 
-        df = pd.DataFrame({
-            'timestamp': df1['timestamp'],
-            'asset1': df1['close'],
-            'asset2': df2['close']
-        })
+    def __init__(self, window: int):
+        self.pairs = deque(maxlen=window)  # (r1, r2) per closed bar
+        self.sum1 = 0.0                    # Σr1
+        self.sum2 = 0.0                    # Σr2
+        self.sum22 = 0.0                   # Σr2²
+        self.sum12 = 0.0                   # Σr1·r2
+        self.last_ts = float('-inf')       # Open time of the last bar ingested
+
+    def update(self, r1: float, r2: float):
+        # Drop the pair leaving the window, then add the new one
+        if len(self.pairs) == self.pairs.maxlen:
+            o1, o2 = self.pairs[0]
+            self.sum1 -= o1
+            self.sum2 -= o2
+            self.sum22 -= o2 * o2
+            self.sum12 -= o1 * o2
+        self.pairs.append((r1, r2))
+        self.sum1 += r1
+        self.sum2 += r2
+        self.sum22 += r2 * r2
+        self.sum12 += r1 * r2
+
+    def extend(self, r1: np.ndarray, r2: np.ndarray):
+        if not self.pairs:
+            # Bulk-initialize from history
+            r1 = r1[-self.pairs.maxlen:]
+            r2 = r2[-self.pairs.maxlen:]
+            self.pairs.extend(zip(r1.tolist(), r2.tolist()))
+            self.sum1 = float(r1.sum())
+            self.sum2 = float(r2.sum())
+            self.sum22 = float(r2 @ r2)
+            self.sum12 = float(r1 @ r2)
+        else:
+            for a, b in zip(r1.tolist(), r2.tolist()):
+                self.update(a, b)
 
-        # Calculate log prices and returns
-        df['log1'] = np.log(df['asset1'])
-        df['log2'] = np.log(df['asset2'])
-        df['return1'] = df['log1'].diff()
-        df['return2'] = df['log2'].diff()
+    def beta(self) -> float:
+        n = len(self.pairs)
+        denom = n * self.sum22 - self.sum2 * self.sum2
+        if n < 2 or denom <= 0:
+            return float('nan')
+        return (n * self.sum12 - self.sum1 * self.sum2) / denom
 
-        # Calculate beta (correlation coefficient)
-        beta = df[['return1', 'return2']].cov().iloc[0, 1] / df['return2'].var()
+BETA = BetaTracker(BETA_WINDOW)
 
-        # Spread calculation
-        df['spread'] = df['log1'] - beta * df['log2']
+# Log-close cache per leg: (timestamps, log closes) from the previous call
+_LOG_CLOSE = {}
 
-        # Rolling statistics
-        df['mu'] = df['spread'].rolling(LOOKBACK).mean()
-        df['sigma'] = df['spread'].rolling(LOOKBACK).std()
+def _log_close(key, ohlcv: np.ndarray) -> np.ndarray:
+    """
+    Return log(close) for `ohlcv`, reusing the logs cached for bars seen on the
+    previous call and only taking np.log of the newly arrived tail. The last
+    cached bar is always recomputed since it was still forming.
+    """
+    ts = ohlcv[:, 0]
+    close = ohlcv[:, 4]
+
+    reused = 0
+    cached = _LOG_CLOSE.get(key)
+    if cached is not None and len(ts):
+        cached_ts, cached_log = cached
+        start = np.searchsorted(cached_ts, ts[0])
+        overlap = min(len(cached_ts) - start, len(ts)) - 1
+        if overlap > 0 and np.array_equal(cached_ts[start:start + overlap], ts[:overlap]):
+            reused = overlap
+
+    if reused:
+        log_close = np.concatenate((cached_log[start:start + reused], np.log(close[reused:])))
+    else:
+        log_close = np.log(close)
 
-        # True Range (TR) calculation
-        hl = df1['high'] - df1['low']
-        hc = (df1['high'] - df1['close'].shift()).abs()
-        lc = (df1['low'] - df1['close'].shift()).abs()
-        df['tr'] = pd.concat([hl, hc, lc], axis=1).max(axis=1)
+    _LOG_CLOSE[key] = (ts, log_close)
+    return log_close
 
-        # Average True Range (ATR)
-        df['atr'] = df['tr'].rolling(ATR_PERIOD).mean()
+@njit(cache=True)
+def _indicator_kernel(log1, log2, tr, beta, lookback, atr_period):
+    """
+    Latest spread mean/std over the trailing `lookback` bars and latest ATR.
+
+    Only the last values are used, so mean/std are a two-pass reduction over
+    the tail window. ATR is Wilder smoothing, a recurrence that still walks
+    every bar: atr = atr_prev + (tr - atr_prev) / atr_period.
+
+    Returns:
+        (mu, sigma, atr) floats; mu/sigma are NaN with fewer than `lookback` bars
+    """
+    n = log1.shape[0]
+
+    mu = np.nan
+    sigma = np.nan
+    if n >= lookback:
+        total = 0.0
+        for i in range(n - lookback, n):
+            total += log1[i] - beta * log2[i]
+        mu = total / lookback
+
+        m2 = 0.0
+        for i in range(n - lookback, n):
+            delta = log1[i] - beta * log2[i] - mu
+            m2 += delta * delta
+        sigma = np.sqrt(m2 / (lookback - 1))
+
+    alpha = 1.0 / atr_period
+    atr = np.nan
+    for i in range(n):
+        if np.isnan(atr):
+            atr = tr[i]
+        else:
+            atr += alpha * (tr[i] - atr)
+
+    return mu, sigma, atr
+
+def calculate_indicator(
+    ohlcv1: np.ndarray,
+    ohlcv2: np.ndarray,
+    price1: float,
+    price2: float
+) -> tuple:
+    try:
+        # Validate inputs
+        if len(ohlcv1) == 0 or len(ohlcv2) == 0 or price1 <= 0 or price2 <= 0:
+            return float('nan'), float('nan'), float('nan'), 0.0, float('nan')
+
+        # Log prices, computed only for bars not seen on the previous call
+        log1 = _log_close(1, ohlcv1)
+        log2 = _log_close(2, ohlcv2)
+
+        # Feed returns of bars closed since the last call (the last row is still forming)
+        if ohlcv1[0, 0] > BETA.last_ts:
+            # Buffer no longer reaches back to the last ingested bar; rebuild from history
+            BETA.pairs.clear()
+        ts = ohlcv1[1:-1, 0]
+        new = ts > BETA.last_ts
+        if new.any():
+            BETA.extend(np.diff(log1[:-1])[new], np.diff(log2[:-1])[new])
+            BETA.last_ts = ts[-1]
+        beta = BETA.beta()
+
+        # True Range: max(H-L, |H-prevC|, |L-prevC|); fmax skips the missing
+        # previous close on the first bar, so it falls back to H-L
+        high, low, close = ohlcv1[:, 2], ohlcv1[:, 3], ohlcv1[:, 4]
+        prev_close = np.concatenate(([np.nan], close[:-1]))
+        tr = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+        # Latest spread mean/std and ATR in one compiled pass
+        mu, sigma, atr = _indicator_kernel(log1, log2, tr, beta, LOOKBACK, ATR_PERIOD)
 
         # Current spread
-        current_spread = np.log(price1) - beta * np.log(price2)
+        current_spread = math.log(price1) - beta * math.log(price2)
 
-        return df, current_spread
+        return mu, sigma, atr, current_spread, beta
 
     except Exception as e:
         logger.error(f"Error in indicator calculation: {str(e)}")
-        return pd.DataFrame(), 0.0
+        return float('nan'), float('nan'), float('nan'), 0.0, float('nan')
 
 def get_arbitrage_signal(spread: float, mu: float, sigma: float) -> str:
     try:
-        # Check for NaN/None values
-        if any(pd.isna(x) for x in [spread, mu, sigma]):
+        # Check for NaN values
+        if math.isnan(spread) or math.isnan(mu) or math.isnan(sigma):
             return 'neutral'
 
         # Check thresholds
-        if spread < mu - SIGMA_THRESHOLD * sigma:
+        band = SIGMA_THRESHOLD * sigma
+        if spread < mu - band:
             return 'bullish'
-        elif spread > mu + SIGMA_THRESHOLD * sigma:
+        elif spread > mu + band:
             return 'bearish'
 
         return 'neutral'
@@ -179,54 +336,53 @@ def get_arbitrage_signal(spread: float, mu: float, sigma: float) -> str:
         return 'neutral'
 
 async def manage_positions(exchange, current_price: float, symbol: str):
-    global OPEN_POSITIONS
-    positions_to_remove = []
+    closed = []  # indices into OPEN_POSITIONS
 
     try:
-        for pos in OPEN_POSITIONS:
-            if pos['symbol'] != symbol:
-                continue
-
-            entry_price = pos['entry_price']
-            qty = pos['quantity']
-            side = pos['side']
-            tp_price = pos['tp_price']
-            sl_price = pos['sl_price']
+        n = len(OPEN_POSITIONS)
+        if n == 0:
+            return
 
-            try:
-                if side == 'long':
-                    if current_price >= tp_price:
-                        # logger.info(f"TP hit for LONG {symbol} @ {current_price:.2f}")
-                        # await exchange.create_market_sell_order(symbol, qty)
-                        # positions_to_remove.append(pos)
-                        logger.info(f"TP hit for LONG {symbol} @ {current_price:.6f}")
-                        await exchange.create_market_sell_order(symbol, qty)
-                        track_pnl(entry_price, current_price, qty, 'long')
-                        positions_to_remove.append(pos)
-                    elif current_price <= sl_price:
-                        logger.info(f"SL hit for LONG {symbol} @ {current_price:.2f}")
-                        track_pnl(entry_price, current_price, qty, 'short')
-                        await exchange.create_market_sell_order(symbol, qty)
-                        positions_to_remove.append(pos)
-
-                elif side == 'short':
-                    if current_price <= tp_price:
-                        logger.info(f"TP hit for SHORT {symbol} @ {current_price:.2f}")
-                        await exchange.create_market_buy_order(symbol, qty)
-                        positions_to_remove.append(pos)
-                    elif current_price >= sl_price:
-                        logger.info(f"SL hit for SHORT {symbol} @ {current_price:.2f}")
-                        await exchange.create_market_buy_order(symbol, qty)
-                        positions_to_remove.append(pos)
-            except ccxt.InsufficientFunds:
+        side = OPEN_POSITIONS.side[:n]
+        tp = OPEN_POSITIONS.tp[:n]
+        sl = OPEN_POSITIONS.sl[:n]
+        mine = OPEN_POSITIONS.symbol[:n] == symbol
+
+        # Longs exit at/above TP or at/below SL, shorts the other way round
+        hit_tp = mine & (((side == 1) & (current_price >= tp)) |
+                         ((side == -1) & (current_price <= tp)))
+        hit_sl = mine & ~hit_tp & (((side == 1) & (current_price <= sl)) |
+                                   ((side == -1) & (current_price >= sl)))
+
+        # Send every close order at once instead of one round trip after another
+        hits = np.nonzero(hit_tp | hit_sl)[0]
+        closes = []
+        for i in hits:
+            qty = OPEN_POSITIONS.qty[i]
+            is_long = OPEN_POSITIONS.side[i] == 1
+            kind = 'TP' if hit_tp[i] else 'SL'
+            logger.info(f"{kind} hit for {'LONG' if is_long else 'SHORT'} {symbol} @ {current_price:.6f}")
+            if is_long:
+                closes.append(exchange.create_market_sell_order(symbol, qty))
+            else:
+                closes.append(exchange.create_market_buy_order(symbol, qty))
+
+        results = await asyncio.gather(*closes, return_exceptions=True)
+
+        for i, result in zip(hits, results):
+            if isinstance(result, ccxt.InsufficientFunds):
                 logger.error("Insufficient funds to close position")
-            except ccxt.NetworkError:
+            elif isinstance(result, ccxt.NetworkError):
                 logger.warning("Network error closing position - will retry")
-            except Exception as e:
-                logger.error(f"Error closing position: {str(e)}")
+            elif isinstance(result, BaseException):
+                logger.error(f"Error closing position: {str(result)}")
+            else:
+                if OPEN_POSITIONS.side[i] == 1:
+                    track_pnl(OPEN_POSITIONS.entry[i], current_price, OPEN_POSITIONS.qty[i], 'long')
+                closed.append(i)
 
         # Remove closed positions
-        OPEN_POSITIONS = [pos for pos in OPEN_POSITIONS if pos not in positions_to_remove]
+        OPEN_POSITIONS.remove(closed)
 
     except Exception as e:
         logger.error(f"Position management error: {str(e)}")
@@ -265,8 +421,6 @@ def track_pnl(entry_price: float, exit_price: float, quantity: float, side: str,
 
 
 async def place_order(exchange, signal: str, price: float, atr: float, symbol: str):
-    global OPEN_POSITIONS
-
     try:
         # Validate inputs
         if price <= 0 or atr <= 0 or atr != atr:  # Check for NaN
@@ -291,14 +445,7 @@ async def place_order(exchange, signal: str, price: float, atr: float, symbol: s
                 sl_price = price - SL_MULTIPLIER * atr
 
                 # Track position
-                OPEN_POSITIONS.append({
-                    'symbol': symbol,
-                    'side': 'long',
-                    'entry_price': price,
-                    'quantity': qty,
-                    'tp_price': tp_price,
-                    'sl_price': sl_price
-                })
+                OPEN_POSITIONS.add(symbol, 1, price, qty, tp_price, sl_price)
 
                 logger.info(f"Opened LONG: {qty:.6f} {symbol} @ {price:.2f}")
 
@@ -311,14 +458,7 @@ async def place_order(exchange, signal: str, price: float, atr: float, symbol: s
                 sl_price = price + SL_MULTIPLIER * atr
 
                 # Track position
-                OPEN_POSITIONS.append({
-                    'symbol': symbol,
-                    'side': 'short',
-                    'entry_price': price,
-                    'quantity': qty,
-                    'tp_price': tp_price,
-                    'sl_price': sl_price
-                })
+                OPEN_POSITIONS.add(symbol, -1, price, qty, tp_price, sl_price)
 
                 logger.info(f"Opened SHORT: {qty:.6f} {symbol} @ {price:.2f}")
 
@@ -334,6 +474,7 @@ async def place_order(exchange, signal: str, price: float, atr: float, symbol: s
 
 async def main():
     exchange = None
+    quote_streams = []
     try:
         # Initialize exchange
         exchange = ccxt.binance({
@@ -350,49 +491,52 @@ async def main():
         # Load markets
         await exchange.load_markets()
 
-        # Get market symbols
-        symbols = list(exchange.markets.keys())
-
-        # Convert to DataFrame
-        df_markets = pd.DataFrame(symbols, columns=['Symbol'])
-        df_markets.to_csv("binance_markets.csv", index=False)
-        df_markets = pd.DataFrame(exchange.markets).T
-        print(df_markets[df_markets.index.str.contains("ALCH")])
-        symbols = list(exchange.markets.keys())
-        print([s for s in symbols if 'ALCH' in s])
-        df_markets = pd.DataFrame(exchange.markets).T
-        df_markets.to_csv("binance_markets.csv")
-        print(df_markets[df_markets.index.str.contains("ALCH")])
-        print([s for s in exchange.markets if 'BTC' in s])
-
-
-        futures = [k for k, v in exchange.markets.items() if v['type'] == 'future' and v['active']]
-        print(futures)
-
+        # Optional markets dump for debugging symbol names (set DEBUG_MARKETS=1)
+        if os.getenv("DEBUG_MARKETS"):
+            df_markets = pd.DataFrame(exchange.markets).T
+            df_markets.to_csv("binance_markets.csv")
+            print(df_markets[df_markets.index.str.contains("ALCH")])
+            print([s for s in exchange.markets if 'BTC' in s])
+            print([k for k, v in exchange.markets.items() if v['type'] == 'future' and v['active']])
 
         # Log loaded markets
-        logger.info("Markets loaded successfully")
+        logger.info(f"{len(exchange.markets)} markets loaded")
 
         # Set leverage
         await exchange.set_leverage(LEVERAGE, SYMBOL1)
         logger.info(f"Leverage set to {LEVERAGE}x for {SYMBOL1}")
 
+        # Watch top-of-book quotes for both legs
+        quote_streams = [
+            asyncio.create_task(watch_quotes(exchange, SYMBOL1)),
+            asyncio.create_task(watch_quotes(exchange, SYMBOL2)),
+        ]
+
+        # Indicator values are cached and only refreshed once the current 1m bar has closed
+        next_bar_ms = 0
+        mu = sigma = atr = beta = float('nan')
+
         # Main trading loop
         while True:
             try:
-                # Fetch OHLCV data
-                df1 = await fetch_data(exchange, SYMBOL1, '1m', 1000)
-                df2 = await fetch_data(exchange, SYMBOL2, '1m', 1000)
+                refresh = time.time() * 1000 >= next_bar_ms
 
-                # Skip if data is insufficient
-                if len(df1) < LOOKBACK or len(df2) < LOOKBACK:
-                    logger.info("Insufficient data - waiting...")
-                    await asyncio.sleep(CHECK_INTERVAL)
-                    continue
+                if refresh:
+                    # Fetch OHLCV data for both legs concurrently
+                    ohlcv1, ohlcv2 = await asyncio.gather(
+                        fetch_data(exchange, SYMBOL1, '1m', 1000),
+                        fetch_data(exchange, SYMBOL2, '1m', 1000)
+                    )
 
-                # Fetch latest quotes
-                bid1, ask1 = await fetch_quotes(exchange, SYMBOL1)
-                bid2, ask2 = await fetch_quotes(exchange, SYMBOL2)
+                    # Skip if data is insufficient
+                    if len(ohlcv1) < LOOKBACK or len(ohlcv2) < LOOKBACK:
+                        logger.info("Insufficient data - waiting...")
+                        await asyncio.sleep(CHECK_INTERVAL)
+                        continue
+
+                # Latest quotes from the order book watchers
+                bid1, ask1 = get_quotes(SYMBOL1)
+                bid2, ask2 = get_quotes(SYMBOL2)
 
                 # Validate prices
                 if (bid1 <= 0 or ask1 == float('inf') or
@@ -405,19 +549,21 @@ async def main():
                 price1 = (bid1 + ask1) / 2
                 price2 = (bid2 + ask2) / 2
 
-                # Calculate indicators
-                df_indicator, spread = calculate_indicator(df1, df2, price1, price2)
+                if refresh:
+                    # Calculate indicators
+                    mu, sigma, atr, spread, beta = calculate_indicator(ohlcv1, ohlcv2, price1, price2)
 
-                # Skip if indicator calculation failed
-                if df_indicator.empty:
-                    logger.info("Indicator calculation failed - skipping")
-                    await asyncio.sleep(CHECK_INTERVAL)
-                    continue
+                    # Skip if indicator calculation failed
+                    if math.isnan(mu) or math.isnan(atr):
+                        logger.info("Indicator calculation failed - skipping")
+                        await asyncio.sleep(CHECK_INTERVAL)
+                        continue
 
-                # Get latest indicator values
-                mu = df_indicator['mu'].iloc[-1]
-                sigma = df_indicator['sigma'].iloc[-1]
-                atr = df_indicator['atr'].iloc[-1]
+                    # Last row is the forming bar; recompute once it closes
+                    next_bar_ms = int(ohlcv1[-1, 0]) + BAR_MS
+                else:
+                    # Reuse the cached beta, only the live spread moves
+                    spread = math.log(price1) - beta * math.log(price2)
 
                 # Get trading signal
                 signal = get_arbitrage_signal(spread, mu, sigma)
@@ -447,6 +593,8 @@ async def main():
     except Exception as e:
         logger.error(f"Initialization error: {str(e)}")
     finally:
+        for task in quote_streams:
+            task.cancel()
         if exchange:
             await exchange.close()
             logger.info("Exchange connection closed")
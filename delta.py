@@ -65,8 +65,9 @@ import time
 import os
 import hmac
 import hashlib
-import json
 import logging
+import orjson
+from functools import lru_cache
 from dotenv import load_dotenv
 import pandas as pd
 
@@ -82,40 +83,49 @@ BASE_URL = "https://api.delta.exchange"
 PRODUCT_ID = 1  # replace with actual product_id for your instrument
 INTERVAL = '1m'
 
-async def generate_signature(method, timestamp, path, query, body):
-    msg = f"{method}{timestamp}{path}{query}{body}"
-    return hmac.new(API_SECRET.encode(), msg.encode(), hashlib.sha256).hexdigest()
+SESSION = None  # shared pooled aiohttp session, opened in main()
 
+# HMAC keyed once with the secret; each signature works on a copy
+_HMAC_TEMPLATE = hmac.new(API_SECRET.encode(), digestmod=hashlib.sha256) if API_SECRET else None
 
-async def delta_request(method, path, params=None, payload=None, auth=True):
+def generate_signature(method, timestamp, path, query, body):
+    if _HMAC_TEMPLATE is None:
+        raise RuntimeError("DELTA_API_SECRET is not set - cannot sign Delta requests")
+    h = _HMAC_TEMPLATE.copy()
+    h.update(f"{method}{timestamp}{path}{query}{body}".encode())
+    return h.hexdigest()
+
+
+async def delta_request(method, path, params=None, payload=None, auth=True, body=None):
+    # `body` is an already-serialized JSON string and takes precedence over `payload`
     url = BASE_URL + path
     timestamp = str(int(time.time()))
     query_str = ''
     if params:
         query_str = '?' + '&'.join(f"{k}={v}" for k, v in params.items())
-    body_str = json.dumps(payload) if payload else ''
+    if body is None:
+        body = orjson.dumps(payload).decode() if payload else ''
 
     headers = {
         'Content-Type': 'application/json'
     }
 
     if auth:
-        signature = await generate_signature(method, timestamp, path, query_str, body_str)
+        signature = generate_signature(method, timestamp, path, query_str, body)
         headers.update({
             'api-key': API_KEY,
             'timestamp': timestamp,
             'signature': signature
         })
 
-    async with aiohttp.ClientSession() as session:
-        async with session.request(
-            method, url, params=params, data=body_str if payload else None, headers=headers
-        ) as resp:
-            if resp.status >= 400:
-                text = await resp.text()
-                logger.error(f"HTTP {resp.status} - {text}")
-            resp.raise_for_status()
-            return await resp.json()
+    async with SESSION.request(
+        method, url, params=params, data=body or None, headers=headers
+    ) as resp:
+        if resp.status >= 400:
+            text = await resp.text()
+            logger.error(f"HTTP {resp.status} - {text}")
+        resp.raise_for_status()
+        return orjson.loads(await resp.read())
 
 
 async def fetch_ohlcv(product_id, interval='1m', limit=100):
@@ -142,31 +152,43 @@ async def fetch_ticker(product_id):
     return bid, ask
 
 
-async def place_order(product_id, side, size, price=None, order_type="limit_order"):
-    payload = {
+@lru_cache(maxsize=None)
+def _order_body_prefix(product_id, side, order_type):
+    # Fixed fields of an order body, serialized once per product/side/type (closing brace dropped)
+    return orjson.dumps({
         "product_id": product_id,
         "side": side,
-        "order_type": order_type,
-        "size": size
-    }
+        "order_type": order_type
+    }).decode()[:-1]
+
+
+async def place_order(product_id, side, size, price=None, order_type="limit_order"):
+    body = f'{_order_body_prefix(product_id, side, order_type)},"size":{orjson.dumps(size).decode()}'
     if price:
-        payload["limit_price"] = str(price)
-    data = await delta_request("POST", "/v2/orders", payload=payload, auth=True)
+        body += f',"limit_price":"{price}"'
+    data = await delta_request("POST", "/v2/orders", body=body + '}', auth=True)
     return data
 
 
 async def main():
-    logger.info("Loading OHLCV")
-    df = await fetch_ohlcv(PRODUCT_ID)
-    logger.info(df.tail())
-
-    bid, ask = await fetch_ticker(PRODUCT_ID)
-    mid = (bid + ask) / 2
-    logger.info(f"Bid: {bid}, Ask: {ask}, Mid: {mid}")
-
-    logger.info("Placing test order")
-    order = await place_order(PRODUCT_ID, side="buy", size=1, price=mid)
-    logger.info(order)
+    global SESSION
+    connector = aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, keepalive_timeout=75)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        SESSION = session
+
+        logger.info("Loading OHLCV and ticker")
+        df, (bid, ask) = await asyncio.gather(
+            fetch_ohlcv(PRODUCT_ID),
+            fetch_ticker(PRODUCT_ID)
+        )
+        logger.info(df.tail())
+
+        mid = (bid + ask) / 2
+        logger.info(f"Bid: {bid}, Ask: {ask}, Mid: {mid}")
+
+        logger.info("Placing test order")
+        order = await place_order(PRODUCT_ID, side="buy", size=1, price=mid)
+        logger.info(order)
 
 
 if __name__ == "__main__":